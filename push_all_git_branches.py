@@ -4,42 +4,423 @@
 支援跨平台執行（Windows、macOS、Linux）
 """
 
+import io
 import os
+import re
+import stat
 import subprocess
 import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Set, Tuple
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+
+class RepoResult(NamedTuple):
+    """單一 Repository 的處理結果"""
+
+    repo_path: Path
+    success: bool
+    log: str
+
+
+class RepoState(NamedTuple):
+    """推送前掃描到的 Repository 狀態"""
+
+    dirty: bool  # 有未提交的變更
+    unpushed: bool  # 有遠端不存在的本地分支
 
 
 class GitRepoPusher:
     """Git Repository 推送器"""
 
-    def __init__(self, root_path: str):
+    # 執行成功後可能改變分支參照的 Git 子命令
+    REF_CHANGING_COMMANDS = {"push", "fetch", "checkout", "pull", "branch"}
+    # 背景執行 git maintenance 的最短間隔（秒）
+    MAINTENANCE_INTERVAL = 24 * 60 * 60
+
+    def __init__(self, root_path: str, full_fetch: bool = False, max_depth: int = 2):
         """
         初始化
 
         Args:
             root_path: 要掃描的根目錄路徑
+            full_fetch: 是否將已轉為 partial clone 的專案恢復為完整 fetch
+            max_depth: 往下掃描 Git 專案的最大目錄層數
         """
         self.root_path = Path(root_path).resolve()
+        self.max_depth = max_depth
+        # 只在啟動時偵測一次 Git 版本，之後依功能旗標選擇命令
+        self.git_version = self.get_git_version()
+        self._can_protocol_v2 = self.git_version >= (2, 18, 0)
+        self._can_parallel_fetch = self.git_version >= (2, 24, 0)
+        self._can_maintenance = self.git_version >= (2, 30, 0)
+        self._can_refetch = self.git_version >= (2, 36, 0)
+        self.full_fetch = full_fetch
+        self._git_env = self.build_git_env()
+        # 每個 Repository 的 core.sshCommand（含 includeIf 與專案設定）
+        self._ssh_commands: Dict[Path, str] = {}
+        # 平行處理時，每個執行緒將輸出寫入各自的緩衝區
+        self._local = threading.local()
+        self._console_lock = threading.Lock()
+        # 每個 Repository 的 (本地分支, 遠端分支) 快取，參照變動後失效
+        self._branch_cache: Dict[Path, Tuple[Set[str], Set[str]]] = {}
+
+    def _log(self, message: str = ""):
+        """
+        輸出訊息；平行處理時先寫入目前執行緒的緩衝區
+
+        Args:
+            message: 訊息內容
+        """
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            print(message)
+        else:
+            buffer.write(message + "\n")
+
+    def _flush_log(self):
+        """將目前執行緒緩衝區的內容輸出到終端機（呼叫者需持有 _console_lock）"""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is not None:
+            print(buffer.getvalue(), end="", flush=True)
+            buffer.seek(0)
+            buffer.truncate()
+
+    def _input(self, prompt: str) -> str:
+        """
+        詢問使用者；同一時間只允許一個專案佔用終端機
+
+        Args:
+            prompt: 提示文字
+
+        Returns:
+            使用者輸入內容
+        """
+        with self._console_lock:
+            self._flush_log()
+            return input(prompt)
+
+    @staticmethod
+    def get_git_version() -> Tuple[int, ...]:
+        """
+        取得 Git 版本
+
+        Returns:
+            版本號 tuple，例如 (2, 39, 5)；無法判斷時回傳 (0,)
+        """
+        try:
+            result = subprocess.run(
+                ["git", "--version"], capture_output=True, timeout=30
+            )
+        except Exception:
+            return (0,)
+
+        # 例如 "git version 2.39.5" 或 "git version 2.41.0.windows.1"
+        match = re.search(rb"(\d+)\.(\d+)(?:\.(\d+))?", result.stdout)
+        if not match:
+            return (0,)
+        return tuple(int(part or 0) for part in match.groups())
+
+    @staticmethod
+    def build_git_env() -> Optional[Dict[str, str]]:
+        """
+        構建執行 Git 命令的環境變數，讓同一主機的 SSH 連線共用一條 master 連線
+
+        使用者已自行設定 GIT_SSH_COMMAND、GIT_SSH，或在 Windows（OpenSSH
+        不支援 ControlMaster）時不做任何變更；各專案的 core.sshCommand
+        由 _env_for 另外判斷。
+
+        Returns:
+            環境變數字典；不需變更時回傳 None（沿用目前環境）
+        """
+        if os.name == "nt" or any(
+            name in os.environ for name in ("GIT_SSH_COMMAND", "GIT_SSH")
+        ):
+            return None
+
+        # unix socket 路徑長度有限，因此直接放在 /tmp 並以 %C（雜湊）命名
+        control_dir = Path("/tmp") / f"gbf-ssh-{os.getuid()}"
+        try:
+            control_dir.mkdir(mode=0o700, exist_ok=True)
+            info = control_dir.lstat()
+        except OSError:
+            return None
+
+        # 目錄可能由其他使用者預先建立，必須是自己擁有且他人無法存取的目錄
+        if (
+            not stat.S_ISDIR(info.st_mode)
+            or info.st_uid != os.getuid()
+            or info.st_mode & 0o077
+        ):
+            print(f"⚠️  {control_dir} 的擁有者或權限不安全，不共用 SSH 連線")
+            return None
+
+        ssh_command = (
+            "ssh -o ControlMaster=auto -o ControlPersist=600 "
+            f"-o ControlPath={control_dir}/%C"
+        )
+        return {**os.environ, "GIT_SSH_COMMAND": ssh_command}
+
+    def get_ssh_command(self, repo_path: Path) -> str:
+        """
+        取得 Repository 實際生效的 core.sshCommand
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            core.sshCommand 的值；未設定時為空字串
+        """
+        if repo_path not in self._ssh_commands:
+            try:
+                result = subprocess.run(
+                    ["git", "config", "--get", "core.sshCommand"],
+                    cwd=repo_path,
+                    capture_output=True,
+                    timeout=30,
+                )
+                value = self._decode(result.stdout)
+            except Exception:
+                value = ""
+            self._ssh_commands[repo_path] = value
+        return self._ssh_commands[repo_path]
+
+    def _env_for(self, repo_path: Path) -> Optional[Dict[str, str]]:
+        """
+        取得在 Repository 中執行 Git 命令的環境變數
+
+        GIT_SSH_COMMAND 會覆蓋 core.sshCommand，因此專案自行設定了
+        core.sshCommand（例如 deploy key）時不共用 SSH 連線。
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            環境變數字典；None 表示沿用目前環境
+        """
+        if self._git_env is None or self.get_ssh_command(repo_path):
+            return None
+        return self._git_env
+
+    def protocol_v2_options(self) -> List[str]:
+        """
+        取得啟用 wire protocol v2 的全域選項
+
+        Returns:
+            Git 全域選項列表；Git 版本不支援時為空列表
+        """
+        return ["-c", "protocol.version=2"] if self._can_protocol_v2 else []
+
+    def build_fetch_command(self, prune: bool = False) -> List[str]:
+        """
+        構建 fetch 所有遠端的命令
+
+        使用 protocol v2 只交換需要的參照；fetch.parallel 讓多個遠端與子模組
+        同時 fetch。各選項依 Git 版本啟用，設定只作用於此次命令，不會寫入
+        設定檔。推送前只需更新遠端追蹤分支，因此不使用 --filter，避免把
+        專案轉為 partial clone；--full-fetch 時以 --no-filter 忽略設定檔中的
+        過濾條件。
+
+        Args:
+            prune: 是否移除遠端已刪除的分支
+
+        Returns:
+            Git 命令列表
+        """
+        command = self.protocol_v2_options()
+        if self._can_parallel_fetch:
+            command.extend(["-c", f"fetch.parallel={os.cpu_count() or 1}"])
+        command.extend(["-c", "submodule.fetchJobs=0", "fetch", "--all"])
+        if prune:
+            command.append("--prune")
+        if self.full_fetch:
+            command.append("--no-filter")
+        return command
+
+    def fetch_all(self, repo_path: Path, prune: bool = False) -> Tuple[bool, str]:
+        """
+        Fetch 所有遠端
+
+        Args:
+            repo_path: Repository 路徑
+            prune: 是否移除遠端已刪除的分支
+
+        Returns:
+            (成功與否, 輸出內容)
+        """
+        if self.full_fetch:
+            success, output = self.restore_full_clone(repo_path)
+            if not success:
+                return False, output
+
+        return self.run_git_streaming(repo_path, self.build_fetch_command(prune))
+
+    def restore_full_clone(self, repo_path: Path) -> Tuple[bool, str]:
+        """
+        將先前被轉為 partial clone 的專案恢復為完整 fetch
+
+        fetch 會沿用設定檔中的 remote.<name>.partialclonefilter，且 fetch --all
+        不會把 --no-filter 傳給各個遠端，因此對設有過濾條件的遠端先以
+        --refetch 補齊略過的物件，再移除該設定。
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            (成功與否, 輸出內容)
+        """
+        success, output = self.run_git_command(
+            repo_path,
+            ["config", "--get-regexp", r"^remote\..*\.partialclonefilter$"],
+        )
+        if not success:
+            return True, ""  # 沒有任何遠端設定過濾條件
+
+        for line in output.splitlines():
+            key = line.split()[0]
+            remote = key[len("remote.") : -len(".partialclonefilter")]
+
+            if self._can_refetch:
+                self._log(f"  📥 補齊 partial clone 略過的物件: {remote}")
+                success, output = self.run_git_streaming(
+                    repo_path,
+                    [
+                        *self.protocol_v2_options(),
+                        "fetch",
+                        "--refetch",
+                        "--no-filter",
+                        remote,
+                    ],
+                )
+                if not success:
+                    return False, output
+            else:
+                self._log(f"  ⚠️  Git 版本低於 2.36，已略過的 blob 會在需要時才下載")
+
+            success, output = self.run_git_command(
+                repo_path, ["config", "--unset", key]
+            )
+            if not success:
+                return False, output
+
+        return True, ""
+
+    def start_maintenance(self, repo_path: Path):
+        """
+        每天最多一次在背景執行 git maintenance，更新 commit-graph
+
+        commit-graph 讓 for-each-ref、merge-base（pull --ff-only）等走訪提交的
+        命令不必逐一解析物件。以 Git 目錄中的時間戳記檔案記錄上次執行時間；
+        背景程序不等待結束，也不輸出任何內容。
+
+        Args:
+            repo_path: Repository 路徑
+        """
+        if not self._can_maintenance:
+            return
+
+        success, output = self.run_git_command(
+            repo_path, ["rev-parse", "--git-common-dir"]
+        )
+        if not success:
+            return
+
+        stamp = repo_path / output / "gbf-last-maint"
+        try:
+            if time.time() - stamp.stat().st_mtime < self.MAINTENANCE_INTERVAL:
+                return
+        except OSError:
+            pass  # 尚未執行過
+
+        try:
+            subprocess.Popen(
+                [
+                    "git",
+                    "maintenance",
+                    "run",
+                    "--task=commit-graph",
+                    "--auto",
+                    "--quiet",
+                ],
+                cwd=repo_path,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                env=self._env_for(repo_path),
+            )
+            stamp.touch()
+        except OSError as e:
+            self._log(f"  ⚠️  無法啟動背景維護: {e}")
+            return
+
+        self._log(f"  🧹 已在背景更新 commit-graph")
+
+    @staticmethod
+    def is_git_repo(path: str) -> bool:
+        """
+        判斷目錄是否為含 .git 的 Git 工作目錄
+
+        Args:
+            path: 目錄路徑
+
+        Returns:
+            是否為 Git 專案
+        """
+        return os.path.lexists(os.path.join(path, ".git"))
+
+    @staticmethod
+    def is_bare_repo(path: str) -> bool:
+        """
+        判斷目錄是否為 bare repository
+
+        Args:
+            path: 目錄路徑
+
+        Returns:
+            是否為 bare repository
+        """
+        return os.path.isfile(os.path.join(path, "HEAD")) and os.path.isdir(
+            os.path.join(path, "objects")
+        )
 
     def find_git_repos(self) -> List[Path]:
         """
         尋找所有 Git 專案
 
+        往下掃描至 max_depth 層；找到專案後不再深入其子目錄。bare repository
+        （鏡像、共用物件資料庫等）沒有本地分支需要推送，略過且不深入。
+
         Returns:
-            包含 .git 目錄的專案路徑列表
+            Git 專案路徑列表
         """
         git_repos = []
 
         print(f"🔍 掃描目錄: {self.root_path}")
 
-        for item in self.root_path.iterdir():
-            if item.is_dir():
-                git_dir = item / ".git"
-                if git_dir.exists():
-                    git_repos.append(item)
-                    print(f"  ✓ 找到 Git 專案: {item.name}")
+        for dirpath, dirnames, _ in os.walk(self.root_path):
+            depth = len(Path(dirpath).relative_to(self.root_path).parts) + 1
+            subdirs = []
+
+            for name in sorted(dirnames):
+                if name == ".git":
+                    continue
+
+                path = os.path.join(dirpath, name)
+                if self.is_git_repo(path):
+                    repo_path = Path(path)
+                    git_repos.append(repo_path)
+                    print(f"  ✓ 找到 Git 專案: {repo_path.relative_to(self.root_path)}")
+                elif self.is_bare_repo(path):
+                    relative_path = Path(path).relative_to(self.root_path)
+                    print(f"  ⏭️  略過 bare repository: {relative_path}")
+                elif depth < self.max_depth:
+                    subdirs.append(name)
+
+            # 就地修改 dirnames，os.walk 只會繼續進入尚未達到深度上限的目錄
+            dirnames[:] = subdirs
 
         return git_repos
 
@@ -57,44 +438,208 @@ class GitRepoPusher:
         Returns:
             (成功與否, 輸出內容)
         """
+        success, output = self.run_git_bytes(repo_path, command, capture_output)
+        # Git 輸出一律為 UTF-8，不依賴系統地區設定（例如 Windows 的 cp950）
+        return success, self._decode(output)
+
+    def run_git_bytes(
+        self, repo_path: Path, command: List[str], capture_output: bool = True
+    ) -> Tuple[bool, bytes]:
+        """
+        執行 Git 命令並回傳未解碼的輸出
+
+        Args:
+            repo_path: Repository 路徑
+            command: Git 命令列表
+            capture_output: 是否捕獲輸出
+
+        Returns:
+            (成功與否, 原始輸出內容)
+        """
         try:
             result = subprocess.run(
                 ["git"] + command,
                 cwd=repo_path,
+                env=self._env_for(repo_path),
                 capture_output=capture_output,
-                text=True,
                 timeout=300,  # 5 分鐘超時
             )
 
             if result.returncode == 0:
-                return True, result.stdout.strip()
+                if self._subcommand(command) in self.REF_CHANGING_COMMANDS:
+                    self._branch_cache.pop(repo_path, None)
+                return True, result.stdout or b""
             else:
-                return False, result.stderr.strip()
+                return False, result.stderr or b""
 
         except subprocess.TimeoutExpired:
-            return False, "命令執行超時"
+            return False, "命令執行超時".encode("utf-8")
+        except Exception as e:
+            return False, str(e).encode("utf-8")
+
+    def run_git_streaming(
+        self,
+        repo_path: Path,
+        command: List[str],
+        max_lines: Optional[int] = 200,
+    ) -> Tuple[bool, str]:
+        """
+        執行耗時的 Git 命令（fetch、pull、push），並即時逐行輸出
+
+        git 的輸出不是終端機時不顯示傳輸進度，因此即時顯示的是參照更新、
+        錯誤與提示等訊息。stdout 與 stderr 合併輸出；預設只保留最後 200 行
+        作為回傳內容，避免輸出很多時佔用大量記憶體。
+
+        Args:
+            repo_path: Repository 路徑
+            command: Git 命令列表
+            max_lines: 保留的輸出行數；None 表示全部保留（需要解析完整輸出時使用）
+
+        Returns:
+            (成功與否, 最後 max_lines 行的輸出內容)
+        """
+        tail = deque(maxlen=max_lines)
+
+        try:
+            process = subprocess.Popen(
+                ["git"] + command,
+                cwd=repo_path,
+                env=self._env_for(repo_path),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
         except Exception as e:
             return False, str(e)
 
-    def get_local_branches(self, repo_path: Path) -> Set[str]:
+        # 與 run_git_command 相同的 5 分鐘超時
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(300, kill)
+        timer.start()
+        try:
+            for raw_line in process.stdout:
+                # 只去除換行；--porcelain 等輸出的行首空白（旗標）必須保留
+                line = raw_line.rstrip(b"\r\n").decode("utf-8", errors="replace")
+                if line.strip():
+                    self._log(f"      │ {line}")
+                    tail.append(line)
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+            process.stdout.close()
+
+        if timed_out.is_set():
+            return False, "命令執行超時"
+        if returncode == 0:
+            if self._subcommand(command) in self.REF_CHANGING_COMMANDS:
+                self._branch_cache.pop(repo_path, None)
+            return True, "\n".join(tail)
+        else:
+            return False, "\n".join(tail)
+
+    @staticmethod
+    def _decode(output: Optional[bytes]) -> str:
         """
-        取得所有本地分支
+        以 UTF-8 解碼 Git 輸出
+
+        Args:
+            output: 原始輸出（未捕獲時為 None）
+
+        Returns:
+            解碼並去除前後空白的字串
+        """
+        return (output or b"").decode("utf-8", errors="replace").strip()
+
+    @staticmethod
+    def _summarize(output: str) -> str:
+        """
+        從已逐行顯示過的輸出中取出一行摘要，避免失敗時重複整段輸出
+
+        Args:
+            output: run_git_streaming 回傳的輸出內容
+
+        Returns:
+            第一個 fatal:/error: 訊息；沒有時為最後一行
+        """
+        lines = [line.strip() for line in output.splitlines() if line.strip()]
+        for line in lines:
+            if line.startswith(("fatal:", "error:")):
+                return line
+        return lines[-1] if lines else ""
+
+    @staticmethod
+    def _subcommand(command: List[str]) -> str:
+        """
+        取得 Git 命令列表中的子命令名稱（略過 -c key=value 等全域選項）
+
+        Args:
+            command: Git 命令列表
+
+        Returns:
+            子命令名稱
+        """
+        args = iter(command)
+        for arg in args:
+            if arg in ("-c", "-C"):
+                next(args, None)
+            elif not arg.startswith("-"):
+                return arg
+        return ""
+
+    def get_all_branches(self, repo_path: Path) -> Tuple[Set[str], Set[str]]:
+        """
+        以單一 git for-each-ref 同時取得本地分支與遠端分支
+
+        結果會快取到下一次改變參照的命令（push、fetch、checkout 等）成功為止。
 
         Args:
             repo_path: Repository 路徑
 
         Returns:
-            本地分支名稱集合
+            (本地分支名稱集合, 遠端分支名稱集合（不含 origin/ 前綴）)
         """
-        success, output = self.run_git_command(
-            repo_path, ["branch", "--format=%(refname:short)"]
+        cached = self._branch_cache.get(repo_path)
+        if cached is not None:
+            return set(cached[0]), set(cached[1])
+
+        success, output = self.run_git_bytes(
+            repo_path,
+            ["for-each-ref", "--format=%(refname)", "refs/heads", "refs/remotes/origin"],
         )
 
+        local_branches = set()
+        remote_branches = set()
+
         if success:
-            branches = set(line.strip() for line in output.split("\n") if line.strip())
-            return branches
+            # 直接比對原始位元組，只對篩選後的分支名稱解碼
+            for ref in output.splitlines():
+                if ref.startswith(b"refs/heads/"):
+                    branch_name = ref[len(b"refs/heads/") :]
+                    local_branches.add(branch_name.decode("utf-8", "replace"))
+                elif ref.startswith(b"refs/remotes/origin/"):
+                    branch_name = ref[len(b"refs/remotes/origin/") :]
+                    if branch_name != b"HEAD":  # 排除 origin/HEAD 這類參照
+                        remote_branches.add(branch_name.decode("utf-8", "replace"))
+
+            self._branch_cache[repo_path] = (set(local_branches), set(remote_branches))
 
-        return set()
+        return local_branches, remote_branches
+
+    def get_local_branches(self, repo_path: Path) -> Set[str]:
+        """
+        取得所有本地分支
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            本地分支名稱集合
+        """
+        return self.get_all_branches(repo_path)[0]
 
     def get_remote_branches(self, repo_path: Path) -> Set[str]:
         """
@@ -106,22 +651,7 @@ class GitRepoPusher:
         Returns:
             遠端分支名稱集合
         """
-        success, output = self.run_git_command(
-            repo_path, ["branch", "-r", "--format=%(refname:short)"]
-        )
-
-        if success:
-            branches = set()
-            for line in output.split("\n"):
-                line = line.strip()
-                if line and "->" not in line:  # 排除 HEAD -> xxx 這類參照
-                    # 移除 origin/ 前綴
-                    if line.startswith("origin/"):
-                        branch_name = line[7:]  # 移除 "origin/"
-                        branches.add(branch_name)
-            return branches
-
-        return set()
+        return self.get_all_branches(repo_path)[1]
 
     def get_current_branch(self, repo_path: Path) -> str:
         """
@@ -136,9 +666,41 @@ class GitRepoPusher:
         success, output = self.run_git_command(repo_path, ["branch", "--show-current"])
         return output if success else ""
 
+    def run_branch_tasks(
+        self, branches: List[str], task: Callable[[str], bool], jobs: int
+    ) -> Dict[str, bool]:
+        """
+        以多個執行緒同時處理分支，並依分支順序輸出各自的紀錄
+
+        Args:
+            branches: 要處理的分支名稱列表
+            task: 處理函式，參數為分支名稱，回傳是否成功
+            jobs: 同時處理的分支數量
+
+        Returns:
+            分支名稱對應是否成功的字典
+        """
+
+        def run(branch: str) -> Tuple[bool, str]:
+            self._local.buffer = io.StringIO()
+            try:
+                return task(branch), self._local.buffer.getvalue()
+            finally:
+                self._local.buffer = None
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            outcomes = list(executor.map(run, branches))
+
+        results = {}
+        for branch, (success, log) in zip(branches, outcomes):
+            if log:
+                self._log(log.rstrip("\n"))
+            results[branch] = success
+        return results
+
     def check_uncommitted_changes(self, repo_path: Path) -> bool:
         """
-        檢查是否有未提交的變更
+        檢查是否有未提交的變更（不含未追蹤的檔案）
 
         Args:
             repo_path: Repository 路徑
@@ -146,8 +708,25 @@ class GitRepoPusher:
         Returns:
             是否有未提交的變更
         """
-        success, output = self.run_git_command(repo_path, ["status", "--porcelain"])
-        return success and bool(output.strip())
+        # 只需要知道有沒有輸出：讀到第一個位元組就結束 git，不解析完整清單
+        try:
+            process = subprocess.Popen(
+                ["git", "status", "--porcelain", "-z", "--untracked-files=no"],
+                cwd=repo_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except Exception:
+            return False
+
+        try:
+            first_byte = process.stdout.read(1)
+        finally:
+            process.kill()
+            process.stdout.close()
+            process.wait()
+
+        return bool(first_byte)
 
     def push_branch(
         self, repo_path: Path, branch: str, force: bool = False, set_upstream: bool = False
@@ -164,7 +743,7 @@ class GitRepoPusher:
         Returns:
             是否成功
         """
-        print(f"    📤 推送分支: {branch}")
+        self._log(f"    📤 推送分支: {branch}")
 
         # 構建推送命令
         command = ["push"]
@@ -177,24 +756,83 @@ class GitRepoPusher:
         if force:
             command.append("--force")
 
-        success, output = self.run_git_command(repo_path, command)
+        success, output = self.run_git_streaming(repo_path, command)
 
         if success:
             if "Everything up-to-date" in output:
-                print(f"      ✓ 已是最新")
+                self._log(f"      ✓ 已是最新")
             elif "new branch" in output:
-                print(f"      ✓ 新分支推送成功")
+                self._log(f"      ✓ 新分支推送成功")
             else:
-                print(f"      ✓ 推送成功")
+                self._log(f"      ✓ 推送成功")
             return True
         else:
-            # 檢查是否需要設定 upstream
-            if "has no upstream branch" in output or "set-upstream" in output:
-                print(f"      ⚠️  需要設定上游分支，重新嘗試...")
-                return self.push_branch(repo_path, branch, force, set_upstream=True)
+            self._log(f"      ❌ 推送失敗: {self._summarize(output)}")
+            return False
+
+    def push_branches(
+        self,
+        repo_path: Path,
+        branches: List[str],
+        force: bool = False,
+        set_upstream: bool = False,
+    ) -> Optional[Dict[str, bool]]:
+        """
+        以單一 git push 同時推送多個分支
+
+        所有分支共用一次連線與協商，pack-objects 也能去除分支間重複的物件。
+
+        Args:
+            repo_path: Repository 路徑
+            branches: 分支名稱列表
+            force: 是否強制推送
+            set_upstream: 是否為所有分支設定上游分支
+
+        Returns:
+            分支名稱對應是否成功的字典；批次推送失敗時回傳 None
+        """
+        self._log(f"    📤 批次推送 {len(branches)} 個分支...")
+
+        command = ["push", "--porcelain"]
+        if set_upstream:
+            command.append("--set-upstream")
+        command.append("origin")
+        command.extend(f"refs/heads/{branch}" for branch in branches)
+        if force:
+            command.append("--force")
+
+        # 每個分支都有一行狀態（--set-upstream 另外還有一行追蹤訊息），
+        # 分支很多時不能只保留最後幾行
+        success, output = self.run_git_streaming(repo_path, command, max_lines=None)
+
+        if not success:
+            self._log(f"      ⚠️  批次推送失敗，改為逐一推送")
+            return None
+
+        # --porcelain 每個參照一行: <flag>\t<from>:<to>\t<summary>
+        statuses = {}
+        for line in output.split("\n"):
+            parts = line.split("\t")
+            if len(parts) >= 2 and ":refs/heads/" in parts[1]:
+                branch = parts[1].split(":refs/heads/", 1)[1]
+                statuses[branch] = parts[0]
+
+        results = {}
+        for branch in branches:
+            flag = statuses.get(branch)
+            if flag == "=":
+                self._log(f"      ✓ {branch}: 已是最新")
+            elif flag == "*":
+                self._log(f"      ✓ {branch}: 新分支推送成功")
+            elif flag in (" ", "+"):
+                self._log(f"      ✓ {branch}: 推送成功")
             else:
-                print(f"      ❌ 推送失敗: {output}")
-                return False
+                self._log(f"      ❌ {branch}: 推送失敗")
+                results[branch] = False
+                continue
+            results[branch] = True
+
+        return results
 
     def push_repo(
         self,
@@ -202,7 +840,10 @@ class GitRepoPusher:
         force: bool = False,
         check_changes: bool = True,
         push_all: bool = False,
-    ):
+        buffered: bool = False,
+        branch_jobs: int = 1,
+        push_existing: Optional[bool] = None,
+    ) -> RepoResult:
         """
         推送單一 Repository
 
@@ -211,103 +852,223 @@ class GitRepoPusher:
             force: 是否強制推送
             check_changes: 是否檢查未提交的變更
             push_all: 是否推送所有分支（包括遠端已存在的）
+            buffered: 是否將輸出收集到緩衝區（平行處理時使用）
+            branch_jobs: 批次推送失敗時，同時逐一推送的分支數量
+            push_existing: 沒有新分支時是否推送現有分支的更新（None 表示詢問使用者）
+
+        Returns:
+            處理結果
         """
-        print(f"\n{'='*80}")
-        print(f"📦 處理專案: {repo_path.name}")
-        print(f"{'='*80}")
+        self._local.buffer = io.StringIO() if buffered else None
+        try:
+            success = self._push_repo(
+                repo_path, force, check_changes, push_all, branch_jobs, push_existing
+            )
+        except Exception as e:
+            self._log(f"\n❌ 處理專案時發生錯誤: {e}")
+            success = False
+        finally:
+            log = self._local.buffer.getvalue() if buffered else ""
+            self._local.buffer = None
+
+        return RepoResult(repo_path, success, log)
+
+    def _push_repo(
+        self,
+        repo_path: Path,
+        force: bool,
+        check_changes: bool,
+        push_all: bool,
+        branch_jobs: int,
+        push_existing: Optional[bool],
+    ) -> bool:
+        """
+        推送單一 Repository 的實際流程
 
-        # 儲存目前分支
-        original_branch = self.get_current_branch(repo_path)
-        print(f"  ℹ️  目前分支: {original_branch}")
+        Args:
+            repo_path: Repository 路徑
+            force: 是否強制推送
+            check_changes: 是否檢查未提交的變更
+            push_all: 是否推送所有分支（包括遠端已存在的）
+            branch_jobs: 批次推送失敗時，同時逐一推送的分支數量
+            push_existing: 沒有新分支時是否推送現有分支的更新（None 表示詢問使用者）
+
+        Returns:
+            是否全部成功
+        """
+        self._log(f"\n{'='*80}")
+        self._log(f"📦 處理專案: {repo_path.name}")
+        self._log(f"{'='*80}")
+
+        self.start_maintenance(repo_path)
 
         # 檢查未提交的變更
         if check_changes and self.check_uncommitted_changes(repo_path):
-            print(f"  ⚠️  警告: 有未提交的變更")
-            response = input(f"  是否繼續推送？(y/n): ").lower()
+            self._log(f"  ⚠️  警告: 有未提交的變更")
+            response = self._input(f"  是否繼續推送？(y/n): ").lower()
             if response != "y":
-                print(f"  ⏭️  跳過此專案")
-                return
+                self._log(f"  ⏭️  跳過此專案")
+                return True
 
         # 先 fetch 取得最新的遠端資訊
-        print(f"  🔄 執行 git fetch...")
-        success, output = self.run_git_command(repo_path, ["fetch", "--all"])
+        self._log(f"  🔄 執行 git fetch...")
+        success, output = self.fetch_all(repo_path)
 
         if not success:
-            print(f"  ❌ Fetch 失敗: {output}")
-            print(f"  ⚠️  將繼續推送，但可能與遠端狀態不同步")
+            self._log(f"  ❌ Fetch 失敗: {self._summarize(output)}")
+            self._log(f"  ⚠️  將繼續推送，但可能與遠端狀態不同步")
 
         # 取得所有分支
-        local_branches = self.get_local_branches(repo_path)
-        remote_branches = self.get_remote_branches(repo_path)
+        local_branches, remote_branches = self.get_all_branches(repo_path)
 
-        print(f"\n  📊 分支統計:")
-        print(f"    本地分支: {len(local_branches)} 個")
-        print(f"    遠端分支: {len(remote_branches)} 個")
+        self._log(f"\n  📊 分支統計:")
+        self._log(f"    本地分支: {len(local_branches)} 個")
+        self._log(f"    遠端分支: {len(remote_branches)} 個")
 
         if not local_branches:
-            print(f"  ⚠️  沒有本地分支可推送")
-            return
+            self._log(f"  ⚠️  沒有本地分支可推送")
+            return True
 
         # 決定要推送哪些分支
         if push_all:
             branches_to_push = local_branches
-            print(f"\n  🔄 推送所有本地分支...")
+            self._log(f"\n  🔄 推送所有本地分支...")
         else:
             # 只推送遠端不存在的分支
             branches_to_push = local_branches - remote_branches
             
             if branches_to_push:
-                print(f"\n  🌱 發現 {len(branches_to_push)} 個本地限定分支:")
+                self._log(f"\n  🌱 發現 {len(branches_to_push)} 個本地限定分支:")
                 for branch in sorted(branches_to_push):
-                    print(f"    - {branch}")
+                    self._log(f"    - {branch}")
             else:
-                print(f"\n  ℹ️  所有本地分支都已存在於遠端")
+                self._log(f"\n  ℹ️  所有本地分支都已存在於遠端")
                 
                 # 詢問是否要推送現有分支的更新
-                response = input(f"  是否推送現有分支的更新？(y/n): ").lower()
-                if response == "y":
+                if push_existing is None:
+                    response = self._input(f"  是否推送現有分支的更新？(y/n): ").lower()
+                    push_existing = response == "y"
+
+                if push_existing:
                     branches_to_push = local_branches
-                    print(f"\n  🔄 推送所有分支的更新...")
+                    self._log(f"\n  🔄 推送所有分支的更新...")
                 else:
-                    print(f"  ✅ 專案處理完成")
-                    return
-
-        # 推送所有選定的分支
-        success_count = 0
-        fail_count = 0
-
-        for branch in sorted(branches_to_push):
-            # 切換到該分支
-            print(f"  📌 切換到分支: {branch}")
-            success, output = self.run_git_command(repo_path, ["checkout", branch])
-            
-            if not success:
-                print(f"    ❌ 切換失敗: {output}")
-                fail_count += 1
+                    self._log(f"  ✅ 專案處理完成")
+                    return True
+
+        # 推送所有選定的分支（push 不需要 checkout，HEAD 與工作目錄維持不變）
+        # 遠端不存在的分支是第一次推送，直接設定上游分支
+        branches = sorted(branches_to_push)
+        new_branches = [branch for branch in branches if branch not in remote_branches]
+        existing_branches = [branch for branch in branches if branch in remote_branches]
+
+        results = {}
+        batch_failed = []
+        for group, set_upstream in ((existing_branches, False), (new_branches, True)):
+            if not group:
                 continue
-
-            # 推送分支
-            if self.push_branch(repo_path, branch, force):
-                success_count += 1
+            group_results = self.push_branches(repo_path, group, force, set_upstream)
+            if group_results is None:
+                batch_failed.extend(group)
             else:
-                fail_count += 1
+                results.update(group_results)
 
-        # 切回原始分支
-        if original_branch:
-            print(f"\n  ↩️  切回原始分支: {original_branch}")
-            self.run_git_command(repo_path, ["checkout", original_branch])
+        # 批次推送失敗時逐一推送，以取得各分支的錯誤訊息
+        def push_one(branch: str) -> bool:
+            return self.push_branch(
+                repo_path, branch, force, set_upstream=branch not in remote_branches
+            )
+
+        if branch_jobs > 1 and len(batch_failed) > 1:
+            results.update(self.run_branch_tasks(batch_failed, push_one, branch_jobs))
+        else:
+            for branch in batch_failed:
+                results[branch] = push_one(branch)
+
+        success_count = sum(1 for success in results.values() if success)
+        fail_count = len(results) - success_count
 
         # 顯示統計
-        print(f"\n  📊 推送統計:")
-        print(f"    成功: {success_count} 個")
-        print(f"    失敗: {fail_count} 個")
-        print(f"\n  ✅ 專案處理完成")
+        self._log(f"\n  📊 推送統計:")
+        self._log(f"    成功: {success_count} 個")
+        self._log(f"    失敗: {fail_count} 個")
+        self._log(f"\n  ✅ 專案處理完成")
+        return fail_count == 0
+
+    def scan_repo_state(self, repo_path: Path, check_changes: bool) -> RepoState:
+        """
+        掃描單一 Repository 的狀態（只讀取本地資料，不連線到遠端）
+
+        Args:
+            repo_path: Repository 路徑
+            check_changes: 是否檢查未提交的變更
+
+        Returns:
+            Repository 狀態
+        """
+        dirty = check_changes and self.check_uncommitted_changes(repo_path)
+        local_branches, remote_branches = self.get_all_branches(repo_path)
+        return RepoState(dirty, bool(local_branches - remote_branches))
+
+    def _scan_repo_states(
+        self, repos: List[Path], check_changes: bool, jobs: int
+    ) -> Dict[Path, RepoState]:
+        """
+        同時掃描所有 Repository 的狀態
+
+        Args:
+            repos: Repository 路徑列表
+            check_changes: 是否檢查未提交的變更
+            jobs: 同時掃描的專案數量
+
+        Returns:
+            Repository 路徑對應狀態的字典
+        """
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            states = executor.map(
+                lambda repo: self.scan_repo_state(repo, check_changes), repos
+            )
+            return dict(zip(repos, states))
+
+    def _confirm_repos(self, repos: List[Path], question: str) -> Set[Path]:
+        """
+        一次詢問使用者是否處理多個 Repository
+
+        無法讀取輸入（例如 stdin 已關閉）時視為 N，其餘專案都不處理。
+
+        Args:
+            repos: Repository 路徑列表
+            question: 詢問內容
+
+        Returns:
+            使用者確認的 Repository 路徑集合
+        """
+        for repo in repos:
+            print(f"    - {repo.relative_to(self.root_path)}")
+
+        selected = set()
+        try:
+            response = input(f"  {question}(y/N/select): ").lower()
+            if response == "y":
+                return set(repos)
+            if response != "select":
+                return set()
+
+            for repo in repos:
+                response = input(f"    {repo.relative_to(self.root_path)}？(y/n): ").lower()
+                if response == "y":
+                    selected.add(repo)
+        except EOFError:
+            print("\n  ⚠️  無法讀取輸入，視為 N")
+        return selected
 
     def push_all_repos(
         self,
         force: bool = False,
         check_changes: bool = True,
         push_all: bool = False,
+        jobs: int = 1,
+        branch_jobs: int = 1,
     ):
         """
         推送所有 Git Repositories
@@ -316,6 +1077,8 @@ class GitRepoPusher:
             force: 是否強制推送
             check_changes: 是否檢查未提交的變更
             push_all: 是否推送所有分支
+            jobs: 同時處理的專案數量
+            branch_jobs: 批次推送失敗時，每個專案中同時逐一推送的分支數量
         """
         repos = self.find_git_repos()
 
@@ -325,18 +1088,72 @@ class GitRepoPusher:
 
         print(f"\n✓ 共找到 {len(repos)} 個 Git 專案\n")
 
-        for repo in repos:
-            try:
-                self.push_repo(repo, force, check_changes, push_all)
-            except KeyboardInterrupt:
-                print("\n\n⚠️  使用者中斷操作")
-                sys.exit(1)
-            except Exception as e:
-                print(f"\n❌ 處理專案時發生錯誤: {e}")
-                continue
+        # 先同時掃描所有專案，把需要使用者決定的事項集中在開始前一次詢問，
+        # 之後的推送階段不再等待輸入
+        print(f"🔎 檢查專案狀態...")
+        states = self._scan_repo_states(repos, check_changes, jobs)
+        push_existing = set()
+
+        try:
+            dirty = [repo for repo in repos if states[repo].dirty]
+            if dirty:
+                print(f"\n⚠️  以下 {len(dirty)} 個專案有未提交的變更:")
+                confirmed = self._confirm_repos(dirty, "是否繼續推送這些專案？")
+                for repo in dirty:
+                    if repo not in confirmed:
+                        print(f"  ⏭️  跳過專案: {repo.relative_to(self.root_path)}")
+                repos = [
+                    repo for repo in repos if not states[repo].dirty or repo in confirmed
+                ]
+
+            up_to_date = [repo for repo in repos if not states[repo].unpushed]
+            if up_to_date and not push_all:
+                print(f"\nℹ️  以下 {len(up_to_date)} 個專案的所有本地分支都已存在於遠端:")
+                push_existing = self._confirm_repos(
+                    up_to_date, "是否推送這些專案現有分支的更新？"
+                )
+        except KeyboardInterrupt:
+            print("\n\n⚠️  使用者中斷操作")
+            sys.exit(1)
+
+        jobs = max(1, min(jobs, len(repos) or 1))
+        buffered = jobs > 1
+        failed = []
+
+        executor = ThreadPoolExecutor(max_workers=jobs)
+        try:
+            futures = [
+                executor.submit(
+                    self.push_repo,
+                    repo,
+                    force,
+                    False,
+                    push_all,
+                    buffered,
+                    branch_jobs,
+                    repo in push_existing,
+                )
+                for repo in repos
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                if buffered:
+                    with self._console_lock:
+                        print(result.log, end="", flush=True)
+                if not result.success:
+                    failed.append(result.repo_path)
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            print("\n\n⚠️  使用者中斷操作")
+            sys.exit(1)
+        executor.shutdown()
 
         print(f"\n{'='*80}")
         print(f"🎉 所有專案處理完成！")
+        if failed:
+            print(f"⚠️  有 {len(failed)} 個專案未完全成功:")
+            for repo in sorted(failed):
+                print(f"  - {repo.name}")
         print(f"{'='*80}")
 
 
@@ -355,6 +1172,7 @@ def main():
   %(prog)s --force                  # 強制推送
   %(prog)s --no-check               # 不檢查未提交的變更
   %(prog)s /path/to/projects -a -f  # 指定目錄、推送所有分支並強制推送
+  %(prog)s --jobs 1                 # 逐一處理專案，即時顯示 Git 輸出
         """,
     )
 
@@ -382,6 +1200,36 @@ def main():
         help="不檢查未提交的變更",
     )
 
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="同時處理的專案數量（預設為 CPU 核心數）；大於 1 時每個專案的輸出"
+        "會在處理完成後一次顯示，使用 -j 1 可即時顯示 Git 的輸出",
+    )
+
+    parser.add_argument(
+        "--branch-jobs",
+        type=int,
+        default=1,
+        help="批次推送失敗時，每個專案中同時逐一推送的分支數量（預設為 1）",
+    )
+
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=2,
+        help="往下掃描 Git 專案的最大目錄層數（預設為 2）",
+    )
+
+    parser.add_argument(
+        "--full-fetch",
+        action="store_true",
+        help="將先前已轉為 partial clone 的專案補齊略過的物件，"
+        "並移除過濾設定改為完整 fetch",
+    )
+
     args = parser.parse_args()
 
     # 檢查路徑是否存在
@@ -403,11 +1251,15 @@ def main():
             sys.exit(0)
 
     # 執行推送
-    pusher = GitRepoPusher(str(path))
+    pusher = GitRepoPusher(
+        str(path), full_fetch=args.full_fetch, max_depth=args.max_depth
+    )
     pusher.push_all_repos(
         force=args.force,
         check_changes=not args.no_check,
         push_all=args.all,
+        jobs=args.jobs,
+        branch_jobs=args.branch_jobs,
     )
 
 
@@ -4,42 +4,610 @@
 支援跨平台執行（Windows、macOS、Linux）
 """
 
+import io
 import os
+import queue
+import re
+import shutil
+import stat
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Set, Tuple
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+
+class RepoResult(NamedTuple):
+    """單一 Repository 的處理結果"""
+
+    repo_path: Path
+    success: bool
+    log: str
 
 
 class GitRepoUpdater:
     """Git Repository 更新器"""
 
-    def __init__(self, root_path: str):
+    # 執行成功後可能改變分支參照的 Git 子命令
+    REF_CHANGING_COMMANDS = {"push", "fetch", "checkout", "pull", "branch"}
+    # 背景執行 git maintenance 的最短間隔（秒）
+    MAINTENANCE_INTERVAL = 24 * 60 * 60
+
+    def __init__(
+        self,
+        root_path: str,
+        full_fetch: bool = False,
+        check_remote: bool = True,
+        max_depth: int = 2,
+        alternates: Optional[str] = None,
+    ):
         """
         初始化
 
         Args:
             root_path: 要掃描的根目錄路徑
+            full_fetch: 是否完整 fetch（不使用 --filter=blob:none）
+            check_remote: 是否先比對遠端分支，遠端沒有變更時略過 fetch
+            max_depth: 往下掃描 Git 專案的最大目錄層數
+            alternates: 共用物件資料庫（bare repository）路徑，None 表示不共用
         """
         self.root_path = Path(root_path).resolve()
+        self.max_depth = max_depth
+        self.alternates = (
+            Path(alternates).expanduser().resolve() if alternates else None
+        )
+        self.check_remote = check_remote
+        # 只在啟動時偵測一次 Git 版本，之後依功能旗標選擇命令
+        self.git_version = self.get_git_version()
+        self._can_protocol_v2 = self.git_version >= (2, 18, 0)
+        self._can_parallel_fetch = self.git_version >= (2, 24, 0)
+        self._can_partial_fetch = self.git_version >= (2, 26, 0)
+        self._can_maintenance = self.git_version >= (2, 30, 0)
+        self._can_refetch = self.git_version >= (2, 36, 0)
+        self.full_fetch = full_fetch
+        self.partial_fetch = not full_fetch and self._can_partial_fetch
+        if not full_fetch and not self._can_partial_fetch:
+            print("⚠️  Git 版本低於 2.26，不使用 partial fetch（--filter=blob:none）")
+        self._git_env = self.build_git_env()
+        # 每個 Repository 的 core.sshCommand（含 includeIf 與專案設定）
+        self._ssh_commands: Dict[Path, str] = {}
+        # 平行處理時，每個執行緒將輸出寫入各自的緩衝區
+        self._local = threading.local()
+        self._console_lock = threading.Lock()
+        # 同一時間只允許一個專案 fetch 到共用物件資料庫
+        self._shared_lock = threading.Lock()
+        # 每個 Repository 的 (本地分支, 遠端分支, 上游) 快取，參照變動後失效
+        self._branch_cache: Dict[
+            Path, Tuple[Set[str], Set[str], Dict[str, str]]
+        ] = {}
+        # 掃描階段以 ls-remote 取得的 origin 分支，留給略過 fetch 的判斷使用
+        self._scanned_heads: Dict[Path, Dict[str, str]] = {}
+
+    def _log(self, message: str = ""):
+        """
+        輸出訊息；平行處理時先寫入目前執行緒的緩衝區
+
+        Args:
+            message: 訊息內容
+        """
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            print(message)
+        else:
+            buffer.write(message + "\n")
+
+    @staticmethod
+    def get_git_version() -> Tuple[int, ...]:
+        """
+        取得 Git 版本
+
+        Returns:
+            版本號 tuple，例如 (2, 39, 5)；無法判斷時回傳 (0,)
+        """
+        try:
+            result = subprocess.run(
+                ["git", "--version"], capture_output=True, timeout=30
+            )
+        except Exception:
+            return (0,)
+
+        # 例如 "git version 2.39.5" 或 "git version 2.41.0.windows.1"
+        match = re.search(rb"(\d+)\.(\d+)(?:\.(\d+))?", result.stdout)
+        if not match:
+            return (0,)
+        return tuple(int(part or 0) for part in match.groups())
+
+    @staticmethod
+    def build_git_env() -> Optional[Dict[str, str]]:
+        """
+        構建執行 Git 命令的環境變數，讓同一主機的 SSH 連線共用一條 master 連線
+
+        使用者已自行設定 GIT_SSH_COMMAND、GIT_SSH，或在 Windows（OpenSSH
+        不支援 ControlMaster）時不做任何變更；各專案的 core.sshCommand
+        由 _env_for 另外判斷。
+
+        Returns:
+            環境變數字典；不需變更時回傳 None（沿用目前環境）
+        """
+        if os.name == "nt" or any(
+            name in os.environ for name in ("GIT_SSH_COMMAND", "GIT_SSH")
+        ):
+            return None
+
+        # unix socket 路徑長度有限，因此直接放在 /tmp 並以 %C（雜湊）命名
+        control_dir = Path("/tmp") / f"gbf-ssh-{os.getuid()}"
+        try:
+            control_dir.mkdir(mode=0o700, exist_ok=True)
+            info = control_dir.lstat()
+        except OSError:
+            return None
+
+        # 目錄可能由其他使用者預先建立，必須是自己擁有且他人無法存取的目錄
+        if (
+            not stat.S_ISDIR(info.st_mode)
+            or info.st_uid != os.getuid()
+            or info.st_mode & 0o077
+        ):
+            print(f"⚠️  {control_dir} 的擁有者或權限不安全，不共用 SSH 連線")
+            return None
+
+        ssh_command = (
+            "ssh -o ControlMaster=auto -o ControlPersist=600 "
+            f"-o ControlPath={control_dir}/%C"
+        )
+        return {**os.environ, "GIT_SSH_COMMAND": ssh_command}
+
+    def get_ssh_command(self, repo_path: Path) -> str:
+        """
+        取得 Repository 實際生效的 core.sshCommand
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            core.sshCommand 的值；未設定時為空字串
+        """
+        if repo_path not in self._ssh_commands:
+            try:
+                result = subprocess.run(
+                    ["git", "config", "--get", "core.sshCommand"],
+                    cwd=repo_path,
+                    capture_output=True,
+                    timeout=30,
+                )
+                value = self._decode(result.stdout)
+            except Exception:
+                value = ""
+            self._ssh_commands[repo_path] = value
+        return self._ssh_commands[repo_path]
+
+    def _env_for(self, repo_path: Path) -> Optional[Dict[str, str]]:
+        """
+        取得在 Repository 中執行 Git 命令的環境變數
+
+        GIT_SSH_COMMAND 會覆蓋 core.sshCommand，因此專案自行設定了
+        core.sshCommand（例如 deploy key）時不共用 SSH 連線。
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            環境變數字典；None 表示沿用目前環境
+        """
+        if self._git_env is None or self.get_ssh_command(repo_path):
+            return None
+        return self._git_env
+
+    def protocol_v2_options(self) -> List[str]:
+        """
+        取得啟用 wire protocol v2 的全域選項
+
+        Returns:
+            Git 全域選項列表；Git 版本不支援時為空列表
+        """
+        return ["-c", "protocol.version=2"] if self._can_protocol_v2 else []
+
+    def build_fetch_command(
+        self, prune: bool = False, partial: bool = True
+    ) -> List[str]:
+        """
+        構建 fetch 所有遠端的命令
+
+        使用 protocol v2 只交換需要的參照；partial fetch 時略過 blob，
+        只下載提交與樹狀結構，首次執行會將專案轉為 partial clone；
+        --full-fetch 時以 --no-filter 忽略設定檔中的過濾條件。
+        fetch.parallel 讓多個遠端與子模組同時 fetch。各選項依 Git 版本啟用，
+        設定只作用於此次命令，不會寫入設定檔。
+
+        Args:
+            prune: 是否移除遠端已刪除的分支
+            partial: 是否允許 partial fetch（仍受 --full-fetch 限制）
+
+        Returns:
+            Git 命令列表
+        """
+        command = self.protocol_v2_options()
+        if self._can_parallel_fetch:
+            command.extend(["-c", f"fetch.parallel={os.cpu_count() or 1}"])
+        command.extend(["-c", "submodule.fetchJobs=0", "fetch", "--all"])
+        if prune:
+            command.append("--prune")
+        if partial and self.partial_fetch:
+            command.append("--filter=blob:none")
+        elif self.full_fetch:
+            command.append("--no-filter")
+        return command
+
+    def fetch_all(self, repo_path: Path, prune: bool = False) -> Tuple[bool, str]:
+        """
+        Fetch 所有遠端
+
+        Args:
+            repo_path: Repository 路徑
+            prune: 是否移除遠端已刪除的分支
+
+        Returns:
+            (成功與否, 輸出內容)
+        """
+        success, output = self.run_git_streaming(
+            repo_path, self.build_fetch_command(prune)
+        )
+
+        # 有多個遠端時 --filter 只能用於 partial clone 的遠端，改為一般 fetch
+        if not success and "--filter can only be used" in output:
+            success, output = self.run_git_streaming(
+                repo_path, self.build_fetch_command(prune, partial=False)
+            )
+
+        return success, output
+
+    def restore_full_clone(self, repo_path: Path) -> Tuple[bool, str]:
+        """
+        將先前被轉為 partial clone 的專案恢復為完整 fetch
+
+        fetch 會沿用設定檔中的 remote.<name>.partialclonefilter，且 fetch --all
+        不會把 --no-filter 傳給各個遠端，因此對設有過濾條件的遠端先以
+        --refetch 補齊略過的物件，再移除該設定。
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            (成功與否, 輸出內容)
+        """
+        success, output = self.run_git_command(
+            repo_path,
+            ["config", "--get-regexp", r"^remote\..*\.partialclonefilter$"],
+        )
+        if not success:
+            return True, ""  # 沒有任何遠端設定過濾條件
+
+        for line in output.splitlines():
+            key = line.split()[0]
+            remote = key[len("remote.") : -len(".partialclonefilter")]
+
+            if self._can_refetch:
+                self._log(f"  📥 補齊 partial clone 略過的物件: {remote}")
+                success, output = self.run_git_streaming(
+                    repo_path,
+                    [
+                        *self.protocol_v2_options(),
+                        "fetch",
+                        "--refetch",
+                        "--no-filter",
+                        remote,
+                    ],
+                )
+                if not success:
+                    return False, output
+            else:
+                self._log(f"  ⚠️  Git 版本低於 2.36，已略過的 blob 會在需要時才下載")
+
+            success, output = self.run_git_command(
+                repo_path, ["config", "--unset", key]
+            )
+            if not success:
+                return False, output
+
+        return True, ""
+
+    def start_maintenance(self, repo_path: Path):
+        """
+        每天最多一次在背景執行 git maintenance，更新 commit-graph
+
+        commit-graph 讓 for-each-ref、merge-base（pull --ff-only）等走訪提交的
+        命令不必逐一解析物件。以 Git 目錄中的時間戳記檔案記錄上次執行時間；
+        背景程序不等待結束，也不輸出任何內容。
+
+        Args:
+            repo_path: Repository 路徑
+        """
+        if not self._can_maintenance:
+            return
+
+        success, output = self.run_git_command(
+            repo_path, ["rev-parse", "--git-common-dir"]
+        )
+        if not success:
+            return
+
+        stamp = repo_path / output / "gbf-last-maint"
+        try:
+            if time.time() - stamp.stat().st_mtime < self.MAINTENANCE_INTERVAL:
+                return
+        except OSError:
+            pass  # 尚未執行過
+
+        try:
+            subprocess.Popen(
+                [
+                    "git",
+                    "maintenance",
+                    "run",
+                    "--task=commit-graph",
+                    "--auto",
+                    "--quiet",
+                ],
+                cwd=repo_path,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                env=self._env_for(repo_path),
+            )
+            stamp.touch()
+        except OSError as e:
+            self._log(f"  ⚠️  無法啟動背景維護: {e}")
+            return
+
+        self._log(f"  🧹 已在背景更新 commit-graph")
+
+    def get_remote_heads(self, repo_path: Path) -> Optional[Dict[str, str]]:
+        """
+        以 git ls-remote 取得 origin 上所有分支的提交
+
+        只交換參照公告，不下載任何物件。
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            分支名稱對應提交 SHA 的字典；失敗時回傳 None
+        """
+        success, output = self.run_git_bytes(
+            repo_path, [*self.protocol_v2_options(), "ls-remote", "--heads", "origin"]
+        )
+        if not success:
+            return None
+
+        heads = {}
+        for line in output.splitlines():
+            sha, _, ref = line.partition(b"\t")
+            if ref.startswith(b"refs/heads/"):
+                branch_name = ref[len(b"refs/heads/") :]
+                heads[branch_name.decode("utf-8", "replace")] = sha.decode()
+        return heads
+
+    def get_tracking_heads(self, repo_path: Path) -> Dict[str, str]:
+        """
+        取得本地 refs/remotes/origin/* 記錄的提交
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            分支名稱對應提交 SHA 的字典
+        """
+        success, output = self.run_git_bytes(
+            repo_path,
+            ["for-each-ref", "--format=%(objectname) %(refname)", "refs/remotes/origin"],
+        )
+        if not success:
+            return {}
+
+        heads = {}
+        for line in output.splitlines():
+            sha, _, ref = line.partition(b" ")
+            branch_name = ref[len(b"refs/remotes/origin/") :]
+            if branch_name != b"HEAD":  # 排除 origin/HEAD 這類參照
+                heads[branch_name.decode("utf-8", "replace")] = sha.decode()
+        return heads
+
+    def _remote_up_to_date(self, repo_path: Path) -> bool:
+        """
+        檢查 origin 上的分支是否與本地的遠端追蹤分支完全一致
+
+        只比對 origin，因此設定了其他遠端（例如 fork 的 upstream）時一律不略過，
+        讓 fetch --all 照常更新所有遠端。
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            是否可以略過 fetch
+        """
+        success, output = self.run_git_command(repo_path, ["remote"])
+        if not success or output.split() != ["origin"]:
+            return False
+
+        remote_heads = self._scanned_heads.pop(repo_path, None)
+        if remote_heads is None:
+            remote_heads = self.get_remote_heads(repo_path)
+        if remote_heads is None:
+            return False
+        return remote_heads == self.get_tracking_heads(repo_path)
+
+    def init_shared_repo(self) -> bool:
+        """
+        第一次使用時在 alternates 路徑建立共用的 bare repository
+
+        Returns:
+            共用物件資料庫是否可用
+        """
+        if not self.is_git_repo(str(self.alternates)):
+            print(f"🌱 建立共用物件資料庫: {self.alternates}")
+            success, output = self.run_git_command(
+                self.root_path, ["init", "--bare", "--quiet", str(self.alternates)]
+            )
+            if not success:
+                print(f"❌ 無法建立共用物件資料庫: {output}")
+                return False
+
+        # 各專案的本地分支可能只引用共用資料庫中的物件，因此共用資料庫
+        # 不自動 gc、不清除無法到達的物件，並以永久保留的 reflog 留住
+        # 被強制更新前的提交（即使手動執行 gc --prune=now 也不會遺失）
+        for key, value in (
+            ("gc.auto", "0"),
+            ("gc.pruneExpire", "never"),
+            ("core.logAllRefUpdates", "always"),
+            ("gc.reflogExpire", "never"),
+            ("gc.reflogExpireUnreachable", "never"),
+        ):
+            success, output = self.run_git_command(
+                self.alternates, ["config", key, value]
+            )
+            if not success:
+                print(f"❌ 無法設定共用物件資料庫: {output}")
+                return False
+        return True
+
+    def _ensure_alternates(self, repo_path: Path, shared: Path) -> bool:
+        """
+        將共用物件資料庫加入 objects/info/alternates（已存在則不重複加入）
+
+        Args:
+            repo_path: Repository 路徑
+            shared: 共用的 bare repository 路徑
+
+        Returns:
+            是否成功
+        """
+        success, output = self.run_git_command(
+            repo_path, ["rev-parse", "--git-path", "objects/info/alternates"]
+        )
+        if not success:
+            self._log(f"  ⚠️  無法取得 alternates 路徑: {output}")
+            return False
+
+        alternates_file = repo_path / output
+        shared_objects = str(shared / "objects")
+        try:
+            entries = alternates_file.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            entries = []
+        if shared_objects in entries:
+            return True
+
+        alternates_file.parent.mkdir(parents=True, exist_ok=True)
+        alternates_file.write_text(
+            "".join(entry + "\n" for entry in entries + [shared_objects]),
+            encoding="utf-8",
+        )
+        self._log(f"  🔗 已加入共用物件資料庫: {shared_objects}")
+
+        # 超過 gc.auto 門檻時才會重新打包（只保留共用資料庫沒有的物件），
+        # 否則不做任何事
+        self.run_git_command(repo_path, ["gc", "--auto", "--quiet"])
+        return True
+
+    def fetch_into_shared(self, repo_path: Path) -> bool:
+        """
+        先將 origin 的分支 fetch 到共用物件資料庫
+
+        各專案的參照放在 refs/remotes/<相對路徑>/ 底下，共用資料庫中已有的
+        物件（例如同一系列 fork 的共同歷史）不會重複下載；之後專案本身的
+        fetch 會透過 alternates 看到這些物件，只需更新參照。
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            是否成功
+        """
+        success, url = self.run_git_command(repo_path, ["remote", "get-url", "origin"])
+        if not success:
+            return False
+        # 相對路徑的 origin 以專案目錄為基準，在共用資料庫中執行前先轉為絕對路徑
+        if os.path.isdir(repo_path / url):
+            url = str((repo_path / url).resolve())
+
+        # 以專案自己的 SSH 設定連線，而不是共用資料庫的設定
+        ssh_command = self.get_ssh_command(repo_path)
+        ssh_options = ["-c", f"core.sshCommand={ssh_command}"] if ssh_command else []
+
+        namespace = re.sub(
+            r"[^A-Za-z0-9._/-]", "_", repo_path.relative_to(self.root_path).as_posix()
+        )
+        with self._shared_lock:
+            success, output = self.run_git_streaming(
+                self.alternates,
+                [
+                    *ssh_options,
+                    *self.protocol_v2_options(),
+                    "fetch",
+                    "--no-tags",
+                    url,
+                    f"+refs/heads/*:refs/remotes/{namespace}/*",
+                ],
+                config_repo=repo_path,
+            )
+        if not success:
+            self._log(
+                f"  ⚠️  無法 fetch 到共用物件資料庫: {self._summarize(output)}"
+            )
+        return success
+
+    @staticmethod
+    def is_git_repo(path: str) -> bool:
+        """
+        判斷目錄是否為 Git 專案（含 .git 的工作目錄，或 bare repository）
+
+        Args:
+            path: 目錄路徑
+
+        Returns:
+            是否為 Git 專案
+        """
+        if os.path.lexists(os.path.join(path, ".git")):
+            return True
+        return os.path.isfile(os.path.join(path, "HEAD")) and os.path.isdir(
+            os.path.join(path, "objects")
+        )
 
     def find_git_repos(self) -> List[Path]:
         """
         尋找所有 Git 專案
 
+        往下掃描至 max_depth 層；找到專案後不再深入其子目錄。
+
         Returns:
-            包含 .git 目錄的專案路徑列表
+            Git 專案路徑列表
         """
         git_repos = []
 
         print(f"🔍 掃描目錄: {self.root_path}")
 
-        for item in self.root_path.iterdir():
-            if item.is_dir():
-                git_dir = item / ".git"
-                if git_dir.exists():
-                    git_repos.append(item)
-                    print(f"  ✓ 找到 Git 專案: {item.name}")
+        for dirpath, dirnames, _ in os.walk(self.root_path):
+            depth = len(Path(dirpath).relative_to(self.root_path).parts) + 1
+            subdirs = []
+
+            for name in sorted(dirnames):
+                if name == ".git":
+                    continue
+
+                path = os.path.join(dirpath, name)
+                if self.is_git_repo(path):
+                    repo_path = Path(path)
+                    git_repos.append(repo_path)
+                    print(f"  ✓ 找到 Git 專案: {repo_path.relative_to(self.root_path)}")
+                elif depth < self.max_depth:
+                    subdirs.append(name)
+
+            # 就地修改 dirnames，os.walk 只會繼續進入尚未達到深度上限的目錄
+            dirnames[:] = subdirs
 
         return git_repos
 
@@ -57,44 +625,249 @@ class GitRepoUpdater:
         Returns:
             (成功與否, 輸出內容)
         """
+        success, output = self.run_git_bytes(repo_path, command, capture_output)
+        # Git 輸出一律為 UTF-8，不依賴系統地區設定（例如 Windows 的 cp950）
+        return success, self._decode(output)
+
+    def run_git_bytes(
+        self, repo_path: Path, command: List[str], capture_output: bool = True
+    ) -> Tuple[bool, bytes]:
+        """
+        執行 Git 命令並回傳未解碼的輸出
+
+        Args:
+            repo_path: Repository 路徑
+            command: Git 命令列表
+            capture_output: 是否捕獲輸出
+
+        Returns:
+            (成功與否, 原始輸出內容)
+        """
         try:
             result = subprocess.run(
                 ["git"] + command,
                 cwd=repo_path,
+                env=self._env_for(repo_path),
                 capture_output=capture_output,
-                text=True,
                 timeout=300,  # 5 分鐘超時
             )
 
             if result.returncode == 0:
-                return True, result.stdout.strip()
+                if self._subcommand(command) in self.REF_CHANGING_COMMANDS:
+                    self._branch_cache.pop(repo_path, None)
+                return True, result.stdout or b""
             else:
-                return False, result.stderr.strip()
+                return False, result.stderr or b""
 
         except subprocess.TimeoutExpired:
-            return False, "命令執行超時"
+            return False, "命令執行超時".encode("utf-8")
+        except Exception as e:
+            return False, str(e).encode("utf-8")
+
+    def run_git_streaming(
+        self,
+        repo_path: Path,
+        command: List[str],
+        config_repo: Optional[Path] = None,
+    ) -> Tuple[bool, str]:
+        """
+        執行耗時的 Git 命令（fetch、pull、push），並即時逐行輸出
+
+        git 的輸出不是終端機時不顯示傳輸進度，因此即時顯示的是參照更新、
+        錯誤與提示等訊息。stdout 與 stderr 合併輸出；只保留最後 200 行
+        作為回傳內容，避免輸出很多時佔用大量記憶體。
+
+        Args:
+            repo_path: Repository 路徑
+            command: Git 命令列表
+            config_repo: 決定 SSH 設定的 Repository（預設為 repo_path）
+
+        Returns:
+            (成功與否, 最後 200 行的輸出內容)
+        """
+        tail = deque(maxlen=200)
+
+        try:
+            process = subprocess.Popen(
+                ["git"] + command,
+                cwd=repo_path,
+                env=self._env_for(config_repo or repo_path),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
         except Exception as e:
             return False, str(e)
 
-    def get_local_branches(self, repo_path: Path) -> Set[str]:
+        # 與 run_git_command 相同的 5 分鐘超時
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(300, kill)
+        timer.start()
+        try:
+            for raw_line in process.stdout:
+                # 只去除換行；--porcelain 等輸出的行首空白（旗標）必須保留
+                line = raw_line.rstrip(b"\r\n").decode("utf-8", errors="replace")
+                if line.strip():
+                    self._log(f"      │ {line}")
+                    tail.append(line)
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+            process.stdout.close()
+
+        if timed_out.is_set():
+            return False, "命令執行超時"
+        if returncode == 0:
+            if self._subcommand(command) in self.REF_CHANGING_COMMANDS:
+                self._branch_cache.pop(repo_path, None)
+            return True, "\n".join(tail)
+        else:
+            return False, "\n".join(tail)
+
+    @staticmethod
+    def _decode(output: Optional[bytes]) -> str:
         """
-        取得所有本地分支
+        以 UTF-8 解碼 Git 輸出
+
+        Args:
+            output: 原始輸出（未捕獲時為 None）
+
+        Returns:
+            解碼並去除前後空白的字串
+        """
+        return (output or b"").decode("utf-8", errors="replace").strip()
+
+    @staticmethod
+    def _summarize(output: str) -> str:
+        """
+        從已逐行顯示過的輸出中取出一行摘要，避免失敗時重複整段輸出
+
+        Args:
+            output: run_git_streaming 回傳的輸出內容
+
+        Returns:
+            第一個 fatal:/error: 訊息；沒有時為最後一行
+        """
+        lines = [line.strip() for line in output.splitlines() if line.strip()]
+        for line in lines:
+            if line.startswith(("fatal:", "error:")):
+                return line
+        return lines[-1] if lines else ""
+
+    @staticmethod
+    def _subcommand(command: List[str]) -> str:
+        """
+        取得 Git 命令列表中的子命令名稱（略過 -c key=value 等全域選項）
+
+        Args:
+            command: Git 命令列表
+
+        Returns:
+            子命令名稱
+        """
+        args = iter(command)
+        for arg in args:
+            if arg in ("-c", "-C"):
+                next(args, None)
+            elif not arg.startswith("-"):
+                return arg
+        return ""
+
+    def _read_refs(
+        self, repo_path: Path
+    ) -> Tuple[Set[str], Set[str], Dict[str, str]]:
+        """
+        以單一 git for-each-ref 同時取得本地分支、遠端分支與各本地分支的上游
+
+        結果會快取到下一次改變參照的命令（push、fetch、checkout 等）成功為止。
 
         Args:
             repo_path: Repository 路徑
 
         Returns:
-            本地分支名稱集合
+            (本地分支名稱集合, 遠端分支名稱集合（不含 origin/ 前綴）,
+            本地分支對應上游參照的字典（未設定上游的分支不列入）)
         """
-        success, output = self.run_git_command(
-            repo_path, ["branch", "--format=%(refname:short)"]
+        cached = self._branch_cache.get(repo_path)
+        if cached is not None:
+            return set(cached[0]), set(cached[1]), dict(cached[2])
+
+        success, output = self.run_git_bytes(
+            repo_path,
+            [
+                "for-each-ref",
+                "--format=%(refname) %(upstream)",
+                "refs/heads",
+                "refs/remotes/origin",
+            ],
         )
 
+        local_branches = set()
+        remote_branches = set()
+        upstreams = {}
+
         if success:
-            branches = set(line.strip() for line in output.split("\n") if line.strip())
-            return branches
+            # 直接比對原始位元組，只對篩選後的分支名稱解碼
+            for line in output.splitlines():
+                ref, _, upstream = line.partition(b" ")
+                if ref.startswith(b"refs/heads/"):
+                    branch_name = ref[len(b"refs/heads/") :].decode("utf-8", "replace")
+                    local_branches.add(branch_name)
+                    if upstream:
+                        upstreams[branch_name] = upstream.decode("utf-8", "replace")
+                elif ref.startswith(b"refs/remotes/origin/"):
+                    branch_name = ref[len(b"refs/remotes/origin/") :]
+                    if branch_name != b"HEAD":  # 排除 origin/HEAD 這類參照
+                        remote_branches.add(branch_name.decode("utf-8", "replace"))
+
+            self._branch_cache[repo_path] = (
+                set(local_branches),
+                set(remote_branches),
+                dict(upstreams),
+            )
+
+        return local_branches, remote_branches, upstreams
+
+    def get_all_branches(self, repo_path: Path) -> Tuple[Set[str], Set[str]]:
+        """
+        同時取得本地分支與遠端分支
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            (本地分支名稱集合, 遠端分支名稱集合（不含 origin/ 前綴）)
+        """
+        local_branches, remote_branches, _ = self._read_refs(repo_path)
+        return local_branches, remote_branches
+
+    def get_branch_upstreams(self, repo_path: Path) -> Dict[str, str]:
+        """
+        取得各本地分支設定的上游參照
+
+        Args:
+            repo_path: Repository 路徑
 
-        return set()
+        Returns:
+            分支名稱對應上游參照（例如 refs/remotes/upstream/main）的字典
+        """
+        return self._read_refs(repo_path)[2]
+
+    def get_local_branches(self, repo_path: Path) -> Set[str]:
+        """
+        取得所有本地分支
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            本地分支名稱集合
+        """
+        return self.get_all_branches(repo_path)[0]
 
     def get_remote_branches(self, repo_path: Path) -> Set[str]:
         """
@@ -106,22 +879,7 @@ class GitRepoUpdater:
         Returns:
             遠端分支名稱集合
         """
-        success, output = self.run_git_command(
-            repo_path, ["branch", "-r", "--format=%(refname:short)"]
-        )
-
-        if success:
-            branches = set()
-            for line in output.split("\n"):
-                line = line.strip()
-                if line and "->" not in line:  # 排除 HEAD -> xxx 這類參照
-                    # 移除 origin/ 前綴
-                    if line.startswith("origin/"):
-                        branch_name = line[7:]  # 移除 "origin/"
-                        branches.add(branch_name)
-            return branches
-
-        return set()
+        return self.get_all_branches(repo_path)[1]
 
     def get_current_branch(self, repo_path: Path) -> str:
         """
@@ -136,37 +894,170 @@ class GitRepoUpdater:
         success, output = self.run_git_command(repo_path, ["branch", "--show-current"])
         return output if success else ""
 
-    def update_branch(self, repo_path: Path, branch: str) -> bool:
+    def run_branch_tasks(
+        self, branches: List[str], task: Callable[[str], bool], jobs: int
+    ) -> Dict[str, bool]:
+        """
+        以多個執行緒同時處理分支，並依分支順序輸出各自的紀錄
+
+        Args:
+            branches: 要處理的分支名稱列表
+            task: 處理函式，參數為分支名稱，回傳是否成功
+            jobs: 同時處理的分支數量
+
+        Returns:
+            分支名稱對應是否成功的字典
+        """
+
+        def run(branch: str) -> Tuple[bool, str]:
+            self._local.buffer = io.StringIO()
+            try:
+                return task(branch), self._local.buffer.getvalue()
+            finally:
+                self._local.buffer = None
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            outcomes = list(executor.map(run, branches))
+
+        results = {}
+        for branch, (success, log) in zip(branches, outcomes):
+            if log:
+                self._log(log.rstrip("\n"))
+            results[branch] = success
+        return results
+
+    def run_in_worktrees(
+        self,
+        repo_path: Path,
+        branches: List[str],
+        task: Callable[[Path, str], bool],
+        jobs: int,
+    ) -> Dict[str, bool]:
         """
-        更新單一分支
+        以多個暫時的 worktree 平行處理分支
+
+        每個 worktree 擁有獨立的 index 與 HEAD，只共用物件資料庫，
+        因此各分支的 checkout 不會互相干擾。
+
+        Args:
+            repo_path: Repository 路徑
+            branches: 要處理的分支名稱列表
+            task: 處理函式，參數為 (worktree 路徑, 分支名稱)，回傳是否成功
+            jobs: 同時處理的分支數量（即 worktree 數量）
+
+        Returns:
+            分支名稱對應是否成功的字典
+        """
+        tmp_dir = Path(tempfile.mkdtemp(prefix="gbf-wt-"))
+        worktrees = queue.Queue()
+        created = []
+
+        try:
+            for i in range(min(jobs, len(branches))):
+                worktree = tmp_dir / f"wt-{i}"
+                success, output = self.run_git_command(
+                    repo_path, ["worktree", "add", "--detach", str(worktree), "HEAD"]
+                )
+                if not success:
+                    self._log(f"    ❌ 建立 worktree 失敗: {output}")
+                    break
+                created.append(worktree)
+                worktrees.put(worktree)
+
+            if not created:
+                return {branch: False for branch in branches}
+
+            def run(branch: str) -> bool:
+                worktree = worktrees.get()
+                try:
+                    return task(worktree, branch)
+                finally:
+                    worktrees.put(worktree)
+
+            return self.run_branch_tasks(branches, run, len(created))
+
+        finally:
+            for worktree in created:
+                self.run_git_command(
+                    repo_path, ["worktree", "remove", "--force", str(worktree)]
+                )
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            self.run_git_command(repo_path, ["worktree", "prune"])
+            # worktree 中的命令同樣會改變此 Repository 的參照
+            self._branch_cache.pop(repo_path, None)
+
+    def fast_forward_branch(self, repo_path: Path, branch: str) -> Optional[bool]:
+        """
+        不切換分支，直接將本地分支參照快轉到 origin 上的對應分支
+
+        使用已 fetch 的 refs/remotes/origin/<branch>，不需再連線到遠端，
+        也不會改動工作目錄。只有在可以快轉時才會成功。
+
+        Args:
+            repo_path: Repository 路徑
+            branch: 分支名稱（不可為目前 checkout 的分支，上游須為 origin/<branch>）
+
+        Returns:
+            是否成功；無法快轉（本地有額外的提交）時回傳 None
+        """
+        self._log(f"    ⏩ 快轉分支: {branch}")
+
+        success, output = self.run_git_command(
+            repo_path,
+            ["fetch", ".", f"refs/remotes/origin/{branch}:refs/heads/{branch}"],
+        )
+
+        if success:
+            self._log(f"      ✓ 已與 origin/{branch} 同步")
+            return True
+        elif "non-fast-forward" in output:
+            self._log(f"      ⚠️  無法快轉，改用 checkout + pull")
+            return None
+        else:
+            self._log(f"      ❌ 快轉失敗: {output}")
+            return False
+
+    def update_branch(
+        self,
+        repo_path: Path,
+        branch: str,
+        work_path: Optional[Path] = None,
+        ff_only: bool = False,
+    ) -> bool:
+        """
+        切換到分支並執行 pull
 
         Args:
             repo_path: Repository 路徑
             branch: 分支名稱
+            work_path: 執行 checkout 的工作目錄（預設為 repo_path，可為 worktree）
+            ff_only: 是否只允許快轉合併
 
         Returns:
             是否成功
         """
-        print(f"    📌 切換到分支: {branch}")
+        work_path = work_path or repo_path
+        self._log(f"    📌 切換到分支: {branch}")
 
         # Checkout 分支
-        success, output = self.run_git_command(repo_path, ["checkout", branch])
+        success, output = self.run_git_command(work_path, ["checkout", branch])
         if not success:
-            print(f"      ❌ 切換失敗: {output}")
+            self._log(f"      ❌ 切換失敗: {output}")
             return False
 
         # Pull 最新變更
-        print(f"    ⬇️  拉取最新變更...")
-        success, output = self.run_git_command(repo_path, ["pull"])
+        self._log(f"    ⬇️  拉取最新變更...")
+        command = ["pull", "--ff-only"] if ff_only else ["pull"]
+        success, output = self.run_git_streaming(work_path, command)
 
         if success:
             if "Already up to date" in output or "Already up-to-date" in output:
-                print(f"      ✓ 已是最新")
+                self._log(f"      ✓ 已是最新")
             else:
-                print(f"      ✓ 更新成功")
+                self._log(f"      ✓ 更新成功")
             return True
         else:
-            print(f"      ⚠️  拉取失敗: {output}")
+            self._log(f"      ⚠️  拉取失敗: {self._summarize(output)}")
             return False
 
     def create_tracking_branch(self, repo_path: Path, branch: str) -> bool:
@@ -180,99 +1071,333 @@ class GitRepoUpdater:
         Returns:
             是否成功
         """
-        print(f"    🌱 建立追蹤分支: {branch}")
+        self._log(f"    🌱 建立追蹤分支: {branch}")
 
         success, output = self.run_git_command(
             repo_path, ["checkout", "-b", branch, f"origin/{branch}"]
         )
 
         if success:
-            print(f"      ✓ 建立成功")
+            self._log(f"      ✓ 建立成功")
             return True
         else:
-            print(f"      ❌ 建立失敗: {output}")
+            self._log(f"      ❌ 建立失敗: {output}")
             return False
 
-    def update_repo(self, repo_path: Path, auto_track: bool = False):
+    def update_repo(
+        self,
+        repo_path: Path,
+        auto_track: bool = False,
+        buffered: bool = False,
+        branch_jobs: int = 1,
+        track_branches: Optional[Set[str]] = None,
+    ) -> RepoResult:
         """
         更新單一 Repository
 
         Args:
             repo_path: Repository 路徑
             auto_track: 是否自動建立遠端追蹤分支
+            buffered: 是否將輸出收集到緩衝區（平行處理時使用）
+            branch_jobs: 同時 checkout + pull 的分支數量（大於 1 時使用 worktree）
+            track_branches: 使用者事先選擇要建立的追蹤分支（auto_track 時忽略）
+
+        Returns:
+            處理結果
         """
-        print(f"\n{'='*80}")
-        print(f"📦 處理專案: {repo_path.name}")
-        print(f"{'='*80}")
+        self._local.buffer = io.StringIO() if buffered else None
+        try:
+            success = self._update_repo(
+                repo_path, auto_track, branch_jobs, track_branches or set()
+            )
+        except Exception as e:
+            self._log(f"\n❌ 處理專案時發生錯誤: {e}")
+            success = False
+        finally:
+            log = self._local.buffer.getvalue() if buffered else ""
+            self._local.buffer = None
+
+        return RepoResult(repo_path, success, log)
+
+    def _update_repo(
+        self,
+        repo_path: Path,
+        auto_track: bool,
+        branch_jobs: int,
+        track_branches: Set[str],
+    ) -> bool:
+        """
+        更新單一 Repository 的實際流程
+
+        Args:
+            repo_path: Repository 路徑
+            auto_track: 是否自動建立遠端追蹤分支
+            branch_jobs: 同時 checkout + pull 的分支數量（大於 1 時使用 worktree）
+            track_branches: 使用者事先選擇要建立的追蹤分支
+
+        Returns:
+            是否全部成功
+        """
+        self._log(f"\n{'='*80}")
+        self._log(f"📦 處理專案: {repo_path.name}")
+        self._log(f"{'='*80}")
+
+        self.start_maintenance(repo_path)
+
+        success, output = self.run_git_command(
+            repo_path, ["rev-parse", "--is-bare-repository"]
+        )
+        if success and output == "true":
+            return self.update_bare_repo(repo_path)
 
         # 儲存目前分支
         original_branch = self.get_current_branch(repo_path)
-        print(f"  ℹ️  目前分支: {original_branch}")
+        self._log(f"  ℹ️  目前分支: {original_branch}")
+
+        # 恢復完整 fetch 不受略過 fetch 的判斷影響
+        if self.full_fetch:
+            success, output = self.restore_full_clone(repo_path)
+            if not success:
+                self._log(
+                    f"  ❌ 無法補齊 partial clone 略過的物件: {self._summarize(output)}"
+                )
+                return False
+
+        # 即使之後略過 fetch，也先登錄共用物件資料庫
+        use_shared = bool(self.alternates) and self._ensure_alternates(
+            repo_path, self.alternates
+        )
 
-        # Fetch 所有遠端變更
-        print(f"  🔄 執行 git fetch --all...")
-        success, output = self.run_git_command(repo_path, ["fetch", "--all", "--prune"])
+        # 遠端分支與本地的遠端追蹤分支一致時略過 fetch
+        if self.check_remote and self._remote_up_to_date(repo_path):
+            self._log(f"  ⚡ 遠端分支已是最新，略過 fetch")
+        else:
+            if use_shared:
+                self._log(f"  🔄 Fetch 到共用物件資料庫...")
+                self.fetch_into_shared(repo_path)
 
-        if not success:
-            print(f"  ❌ Fetch 失敗: {output}")
-            return
+            # Fetch 所有遠端變更
+            self._log(f"  🔄 執行 git fetch --all...")
+            success, output = self.fetch_all(repo_path, prune=True)
+
+            if not success:
+                self._log(f"  ❌ Fetch 失敗: {self._summarize(output)}")
+                return False
 
-        print(f"  ✓ Fetch 完成")
+            self._log(f"  ✓ Fetch 完成")
 
         # 取得所有分支
-        local_branches = self.get_local_branches(repo_path)
-        remote_branches = self.get_remote_branches(repo_path)
+        local_branches, remote_branches = self.get_all_branches(repo_path)
+        upstreams = self.get_branch_upstreams(repo_path)
 
-        print(f"\n  📊 分支統計:")
-        print(f"    本地分支: {len(local_branches)} 個")
-        print(f"    遠端分支: {len(remote_branches)} 個")
+        self._log(f"\n  📊 分支統計:")
+        self._log(f"    本地分支: {len(local_branches)} 個")
+        self._log(f"    遠端分支: {len(remote_branches)} 個")
+
+        all_success = True
 
         # 更新所有本地分支
         if local_branches:
-            print(f"\n  🔄 更新本地分支...")
+            self._log(f"\n  🔄 更新本地分支...")
+            results = {}
+            needs_checkout = []
+
             for branch in sorted(local_branches):
-                self.update_branch(repo_path, branch)
+                if branch == original_branch:
+                    # 目前分支需要同步更新工作目錄
+                    results[branch] = self.update_branch(
+                        repo_path, branch, ff_only=True
+                    )
+                    continue
+
+                # 上游不是 origin 的同名分支（fork 的 upstream、未設定上游等）時，
+                # 交給 pull 依分支設定處理
+                if upstreams.get(branch) != f"refs/remotes/origin/{branch}":
+                    needs_checkout.append(branch)
+                    continue
+
+                success = self.fast_forward_branch(repo_path, branch)
+                if success is None:
+                    needs_checkout.append(branch)
+                else:
+                    results[branch] = success
+
+            # 無法以參照快轉的分支才需要 checkout + pull
+            if branch_jobs > 1 and len(needs_checkout) > 1:
+                results.update(
+                    self.run_in_worktrees(
+                        repo_path,
+                        needs_checkout,
+                        lambda worktree, branch: self.update_branch(
+                            repo_path, branch, worktree
+                        ),
+                        branch_jobs,
+                    )
+                )
+            else:
+                for branch in needs_checkout:
+                    results[branch] = self.update_branch(repo_path, branch)
+
+            if not all(results.values()):
+                all_success = False
 
         # 處理遠端存在但本地不存在的分支
         remote_only = remote_branches - local_branches
 
         if remote_only:
-            print(f"\n  🌐 發現 {len(remote_only)} 個遠端限定分支:")
+            self._log(f"\n  🌐 發現 {len(remote_only)} 個遠端限定分支:")
             for branch in sorted(remote_only):
-                print(f"    - {branch}")
+                self._log(f"    - {branch}")
 
             if auto_track:
-                print(f"\n  🔄 自動建立追蹤分支...")
+                self._log(f"\n  🔄 自動建立追蹤分支...")
                 for branch in sorted(remote_only):
                     self.create_tracking_branch(repo_path, branch)
-            else:
-                # 詢問使用者是否建立追蹤分支
-                response = input(f"\n  是否建立這些追蹤分支？(y/n/all): ").lower()
-
-                if response == "all":
-                    for branch in sorted(remote_only):
-                        self.create_tracking_branch(repo_path, branch)
-                elif response == "y":
-                    for branch in sorted(remote_only):
-                        response = input(f"    建立 {branch}？(y/n): ").lower()
-                        if response == "y":
-                            self.create_tracking_branch(repo_path, branch)
+            elif remote_only & track_branches:
+                # 使用者已在開始前選擇要建立的追蹤分支
+                self._log(f"\n  🔄 建立選擇的追蹤分支...")
+                for branch in sorted(remote_only & track_branches):
+                    self.create_tracking_branch(repo_path, branch)
 
         # 切回原始分支
         if original_branch:
-            print(f"\n  ↩️  切回原始分支: {original_branch}")
+            self._log(f"\n  ↩️  切回原始分支: {original_branch}")
             self.run_git_command(repo_path, ["checkout", original_branch])
 
-        print(f"\n  ✅ 專案更新完成")
+        self._log(f"\n  ✅ 專案更新完成")
+        return all_success
+
+    def update_bare_repo(self, repo_path: Path) -> bool:
+        """
+        更新 bare repository
+
+        bare repository 沒有工作目錄，不需 checkout 或快轉；分支本身就在
+        refs/heads 底下。git clone --mirror 等已設定 fetch refspec 的專案照常
+        fetch --all --prune，一般的 bare clone 沒有 fetch refspec，改為直接
+        把 origin 的分支快轉到 refs/heads（不強制更新、不刪除本地分支）。
+        兩者都不使用 --filter，避免把鏡像轉為 partial clone。
+
+        Args:
+            repo_path: Repository 路徑
 
-    def update_all_repos(self, auto_track: bool = False):
+        Returns:
+            是否成功
+        """
+        self._log(f"  ℹ️  Bare repository，只更新分支參照")
+
+        success, _ = self.run_git_command(
+            repo_path, ["config", "--get-all", "remote.origin.fetch"]
+        )
+        command = [*self.protocol_v2_options(), "fetch"]
+        if success:
+            command.extend(["--all", "--prune"])
+        else:
+            command.extend(["origin", "refs/heads/*:refs/heads/*"])
+
+        self._log(f"  🔄 執行 git fetch...")
+        success, output = self.run_git_streaming(repo_path, command)
+        if not success:
+            self._log(f"  ❌ Fetch 失敗: {self._summarize(output)}")
+            return False
+
+        self._log(f"  ✓ Fetch 完成")
+        self._log(f"\n  ✅ 專案更新完成")
+        return True
+
+    def scan_remote_only(self, repo_path: Path) -> Set[str]:
+        """
+        以 ls-remote 找出 origin 上有、本地卻沒有的分支（不下載任何物件）
+
+        ls-remote 的結果會留給之後略過 fetch 的判斷使用，不重複連線。
+
+        Args:
+            repo_path: Repository 路徑
+
+        Returns:
+            遠端限定分支名稱集合；bare repository 或無法連線時為空集合
+        """
+        success, output = self.run_git_command(
+            repo_path, ["rev-parse", "--is-bare-repository"]
+        )
+        if not success or output == "true":
+            return set()
+
+        remote_heads = self.get_remote_heads(repo_path)
+        if remote_heads is None:
+            return set()
+
+        self._scanned_heads[repo_path] = remote_heads
+        return set(remote_heads) - self.get_local_branches(repo_path)
+
+    def _scan_remote_only(
+        self, repos: List[Path], jobs: int
+    ) -> Dict[Path, Set[str]]:
+        """
+        同時掃描所有 Repository 的遠端限定分支
+
+        Args:
+            repos: Repository 路徑列表
+            jobs: 同時掃描的專案數量
+
+        Returns:
+            Repository 路徑對應遠端限定分支集合的字典
+        """
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            return dict(zip(repos, executor.map(self.scan_remote_only, repos)))
+
+    def _select_tracking_branches(
+        self, candidates: Dict[Path, Set[str]]
+    ) -> Dict[Path, Set[str]]:
+        """
+        在開始更新前一次詢問使用者要建立哪些追蹤分支
+
+        無法讀取輸入（例如 stdin 已關閉）時，其餘分支都不建立。
+
+        Args:
+            candidates: Repository 路徑對應遠端限定分支集合的字典
+
+        Returns:
+            Repository 路徑對應要建立的追蹤分支集合的字典
+        """
+        selected: Dict[Path, Set[str]] = {}
+        try:
+            for repo, branches in candidates.items():
+                if not branches:
+                    continue
+
+                name = repo.relative_to(self.root_path)
+                print(f"\n🌐 {name}: 發現 {len(branches)} 個遠端限定分支:")
+                for branch in sorted(branches):
+                    print(f"    - {branch}")
+
+                response = input(f"  是否建立這些追蹤分支？(y/n/all): ").lower()
+                if response == "all":
+                    selected[repo] = set(branches)
+                elif response == "y":
+                    selected[repo] = set()
+                    for branch in sorted(branches):
+                        response = input(f"    建立 {name}: {branch}？(y/n): ").lower()
+                        if response == "y":
+                            selected[repo].add(branch)
+        except EOFError:
+            print("\n⚠️  無法讀取輸入，不建立其餘的追蹤分支")
+        return selected
+
+    def update_all_repos(
+        self, auto_track: bool = False, jobs: int = 1, branch_jobs: int = 1
+    ):
         """
         更新所有 Git Repositories
 
         Args:
             auto_track: 是否自動建立遠端追蹤分支
+            jobs: 同時處理的專案數量
+            branch_jobs: 每個專案中同時 checkout + pull 的分支數量
         """
         repos = self.find_git_repos()
+        if self.alternates:
+            # 共用物件資料庫位於掃描目錄下時，不當作一般專案更新
+            repos = [repo for repo in repos if repo != self.alternates]
 
         if not repos:
             print("❌ 未找到任何 Git 專案")
@@ -280,18 +1405,57 @@ class GitRepoUpdater:
 
         print(f"\n✓ 共找到 {len(repos)} 個 Git 專案\n")
 
-        for repo in repos:
+        if self.alternates and not self.init_shared_repo():
+            return
+
+        # 需要使用者決定的追蹤分支集中在開始前一次詢問，更新階段不再等待輸入
+        track_branches: Dict[Path, Set[str]] = {}
+        if not auto_track:
+            print(f"🔎 檢查遠端分支...")
             try:
-                self.update_repo(repo, auto_track)
+                track_branches = self._select_tracking_branches(
+                    self._scan_remote_only(repos, jobs)
+                )
             except KeyboardInterrupt:
                 print("\n\n⚠️  使用者中斷操作")
                 sys.exit(1)
-            except Exception as e:
-                print(f"\n❌ 處理專案時發生錯誤: {e}")
-                continue
+
+        jobs = max(1, min(jobs, len(repos)))
+        buffered = jobs > 1
+        failed = []
+
+        executor = ThreadPoolExecutor(max_workers=jobs)
+        try:
+            futures = [
+                executor.submit(
+                    self.update_repo,
+                    repo,
+                    auto_track,
+                    buffered,
+                    branch_jobs,
+                    track_branches.get(repo),
+                )
+                for repo in repos
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                if buffered:
+                    with self._console_lock:
+                        print(result.log, end="", flush=True)
+                if not result.success:
+                    failed.append(result.repo_path)
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            print("\n\n⚠️  使用者中斷操作")
+            sys.exit(1)
+        executor.shutdown()
 
         print(f"\n{'='*80}")
         print(f"🎉 所有專案處理完成！")
+        if failed:
+            print(f"⚠️  有 {len(failed)} 個專案未完全成功:")
+            for repo in sorted(failed):
+                print(f"  - {repo.name}")
         print(f"{'='*80}")
 
 
@@ -308,6 +1472,10 @@ def main():
   %(prog)s /path/to/projects        # 在指定目錄掃描並更新
   %(prog)s --auto-track             # 自動建立所有遠端追蹤分支
   %(prog)s /path/to/projects -a     # 指定目錄並自動建立追蹤分支
+  %(prog)s --jobs 1                 # 逐一處理專案，即時顯示 Git 輸出
+  %(prog)s --no-cache               # 不比對遠端分支，每次都執行 fetch
+  %(prog)s --branch-jobs 4          # 無法快轉的分支以 4 個 worktree 同時更新
+  %(prog)s --alternates ~/work/.shared.git  # 相關的 fork 共用同一個物件資料庫
         """,
     )
 
@@ -322,6 +1490,51 @@ def main():
         help="自動建立所有遠端追蹤分支（不詢問）",
     )
 
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="同時處理的專案數量（預設為 CPU 核心數）；大於 1 時每個專案的輸出"
+        "會在處理完成後一次顯示，使用 -j 1 可即時顯示 Git 的輸出",
+    )
+
+    parser.add_argument(
+        "--branch-jobs",
+        type=int,
+        default=1,
+        help="每個專案中無法快轉的分支同時 checkout + pull 的數量，"
+        "大於 1 時會建立暫時的 worktree（預設為 1）",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不先以 ls-remote 比對遠端分支，每次都執行 fetch",
+    )
+
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=2,
+        help="往下掃描 Git 專案的最大目錄層數（預設為 2）",
+    )
+
+    parser.add_argument(
+        "--full-fetch",
+        action="store_true",
+        help="完整 fetch 所有物件（預設使用 --filter=blob:none 略過 blob）；"
+        "先前已轉為 partial clone 的專案會補齊略過的物件並移除過濾設定",
+    )
+
+    parser.add_argument(
+        "--alternates",
+        metavar="SHARED_PATH",
+        help="透過 objects/info/alternates 共用此 bare repository 的物件資料庫，"
+        "之後 fetch 的物件在相關的 fork 之間只需下載與儲存一次"
+        "（不存在時自動建立；既有的物件不會去除重複）",
+    )
+
     args = parser.parse_args()
 
     # 檢查路徑是否存在
@@ -335,8 +1548,16 @@ def main():
         sys.exit(1)
 
     # 執行更新
-    updater = GitRepoUpdater(str(path))
-    updater.update_all_repos(auto_track=args.auto_track)
+    updater = GitRepoUpdater(
+        str(path),
+        full_fetch=args.full_fetch,
+        max_depth=args.max_depth,
+        check_remote=not args.no_cache,
+        alternates=args.alternates,
+    )
+    updater.update_all_repos(
+        auto_track=args.auto_track, jobs=args.jobs, branch_jobs=args.branch_jobs
+    )
 
 
 if __name__ == "__main__":